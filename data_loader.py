@@ -2,8 +2,8 @@
 # -*- coding:utf-8 -*-
 from __future__ import absolute_import, division, print_function
 
-from typing import Any, List, Optional, Tuple
-from classes import dataclass
+from typing import Any, Iterator, List, Optional, Tuple, Union
+from dataclasses import dataclass
 
 import numpy as np
 import pandas as pd
@@ -11,7 +11,9 @@ import pandas as pd
 import torch
 import torch.nn as nn
 from torch import Tensor
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import (
+    BatchSampler, DataLoader, Dataset, RandomSampler, SequentialSampler
+)
 
 
 @dataclass
@@ -20,6 +22,29 @@ class InputData:
     labels: np.ndarray
 
 
+@dataclass
+class Batch:
+    """Batch of examples, with pinned memory support for DataLoader."""
+    data: Tensor
+    label: Tensor
+
+    def pin_memory(self) -> "Batch":
+        """Copy to page-locked memory; called by DataLoader(pin_memory=True)."""
+        return Batch(data=self.data.pin_memory(), label=self.label.pin_memory())
+
+    def to(self, device: torch.device, non_blocking: bool = False) -> "Batch":
+        """Copy to device; asynchronous from pinned memory if non_blocking."""
+        return Batch(
+            data=self.data.to(device, non_blocking=non_blocking),
+            label=self.label.to(device, non_blocking=non_blocking),
+        )
+
+    def record_stream(self, stream: torch.cuda.Stream) -> None:
+        """Mark memory as used by stream, so it is not freed too early."""
+        self.data.record_stream(stream)
+        self.label.record_stream(stream)
+
+
 class DataReader:
     def __init__(
         self, 
@@ -65,26 +90,187 @@ class DataReader:
             labels=labels_df
         )
 
+    def read_arrays(
+        self, dtype: Any = np.float32
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Read numeric features and labels into contiguous arrays by pyarrow.
+
+        Skips pandas DataFrame construction, for datasets consumed as tensors.
+
+        Raises:
+          ValueError: Features or label contain non-numeric columns.
+        """
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+
+        column_names = self.feature_names + [self.label_name]
+        table = pa_csv.read_csv(
+            self.file_name,
+            convert_options=pa_csv.ConvertOptions(include_columns=column_names),
+        )
+        non_numeric_names = [
+            field.name for field in table.schema
+            if not (
+                pa.types.is_integer(field.type)
+                or pa.types.is_floating(field.type)
+                or pa.types.is_boolean(field.type)
+            )
+        ]
+        if non_numeric_names:
+            raise ValueError(
+                f"Need numeric columns to read arrays, got non-numeric columns: "
+                f"{non_numeric_names}."
+            )
+        features = np.empty((table.num_rows, len(self.feature_names)), dtype=dtype)
+        for c, feature_name in enumerate(self.feature_names):
+            features[:, c] = table.column(feature_name).to_numpy()
+        labels = np.ascontiguousarray(
+            table.column(self.label_name).to_numpy(), dtype=dtype
+        )
+        return features, labels
+
 
 class CustomDataset(Dataset):
+    """Dataset with batched indexing.
+
+    Examples and labels are kept as contiguous tensors. Indexing by an int
+    returns one (example, label) pair, so a plain DataLoader works as usual.
+    Indexing by a list, array or tensor of indices returns a Batch from one
+    tensor slice. make_data_loader samples index lists by a BatchSampler with
+    automatic batching off, so each batch takes a single lookup, with no
+    per-sample calls or collate. For CUDA training, pin the batches so host
+    to device copies are asynchronous:
+
+    ```python
+    loader = make_data_loader(dataset, batch_size=64, pin_memory=True)
+    for batch in loader:
+        batch = batch.to(device, non_blocking=True)
+    ```
+
+    With worker processes, keep prefetch_factor at its default, since pinned
+    memory grows with it.
+
+    Note: features must be numeric, and transform and target_transform are
+    applied to the whole batch when indexing by a batch of indices.
+    """
+
     def __init__(
         self, 
         data_reader: DataReader, 
         transform: Any = None, 
         target_transform: Any = None,
     ) -> None:
-        self.examples, self.labels = data_reader()
+        examples, labels = data_reader.read_arrays()
+        self.examples = torch.from_numpy(examples)
+        self.labels = torch.from_numpy(labels)
         self.transform = transform
         self.target_transform = target_transform
 
     def __len__(self) -> int:
         return len(self.labels)
 
-    def __getitem__(self, idx) -> Tuple[Tensor, float]:
-        example = self.examples[idx, :]
-        label = self.labels[idx]
+    def to(self, device: torch.device) -> "CustomDataset":
+        """Move the whole dataset to device once.
+
+        For datasets fitting in device memory, batches are then gathered on
+        device, with no host to device copy per batch. Load it with
+        num_workers=0 and pin_memory=False.
+        """
+        self.examples = self.examples.to(device)
+        self.labels = self.labels.to(device)
+        return self
+
+    def __getitem__(
+        self, idx: Union[int, List[int], np.ndarray, Tensor]
+    ) -> Union[Tuple[Tensor, Tensor], Batch]:
+        idx = torch.as_tensor(idx, device=self.examples.device)
+        examples = self.examples[idx]
+        labels = self.labels[idx]
         if self.transform:
-            example = self.transform(example)
+            examples = self.transform(examples)
         if self.target_transform:
-            label = self.target_transform(self)
-        return example, label
+            labels = self.target_transform(labels)
+
+        if idx.dim() > 0:
+            return Batch(data=examples, label=labels)
+        return examples, labels
+
+
+def make_data_loader(
+    dataset: CustomDataset,
+    batch_size: int,
+    shuffle: bool = True,
+    num_workers: int = 0,
+    pin_memory: bool = False,
+) -> DataLoader:
+    """Make input pipeline with shuffling and batching.
+
+    The sampler yields whole lists of indices and automatic batching is off,
+    so each Batch comes from one CustomDataset lookup with no collate. With
+    num_workers > 0, batches are built and prefetched by background workers
+    while the training loop computes. That pays off only for expensive
+    transforms, since each batch is then pickled between processes.
+    """
+    sampler = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)
+    return DataLoader(
+        dataset,
+        sampler=BatchSampler(sampler, batch_size=batch_size, drop_last=False),
+        batch_size=None,
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+        persistent_workers=num_workers > 0,
+    )
+
+
+class DataPrefetcher:
+    """Prefetch batches to device on a side CUDA stream.
+
+    The copy of the next batch overlaps with compute on the current batch.
+    The loader must yield Batch, as from make_data_loader, and needs
+    pin_memory=True for the copy to be asynchronous.
+    On a non-CUDA device batches are copied synchronously.
+
+    ```python
+    for batch in DataPrefetcher(loader, device):
+        ...
+    ```
+    """
+
+    def __init__(self, loader: DataLoader, device: torch.device) -> None:
+        self.loader = loader
+        self.device = torch.device(device)
+        self.stream = (
+            torch.cuda.Stream(self.device) if self.device.type == "cuda" else None
+        )
+        self.loader_iter = None
+        self.next_batch = None
+
+    def __iter__(self) -> Iterator[Batch]:
+        self.loader_iter = iter(self.loader)
+        self.preload()
+        return self
+
+    def preload(self) -> None:
+        try:
+            batch = next(self.loader_iter)
+        except StopIteration:
+            self.next_batch = None
+            return
+
+        if self.stream is None:
+            self.next_batch = batch.to(self.device)
+            return
+        with torch.cuda.stream(self.stream):
+            self.next_batch = batch.to(self.device, non_blocking=True)
+
+    def __next__(self) -> Batch:
+        if self.next_batch is None:
+            raise StopIteration
+
+        batch = self.next_batch
+        if self.stream is not None:
+            current_stream = torch.cuda.current_stream(self.device)
+            current_stream.wait_stream(self.stream)
+            batch.record_stream(current_stream)
+        self.preload()
+        return batch
@@ -22,11 +22,13 @@ class LinearRegression:
         self.n_examples, self.n_inputs = self.X_train.shape
 
         if shuffle:
-            idx = list(range(self.n_examples))
-            random.shuffle(idx)
+            idx = np.random.permutation(self.n_examples)
             self.X_train = self.X_train[idx]
             self.y_train = self.y_train[idx]
 
+        # Reshape labels to a column once, instead of per batch.
+        self.y_train = self.y_train.reshape((self.n_examples, -1))
+
     def _create_weights(self):
         """Create model weights and bias."""
         self.w = np.zeros(self.n_inputs).reshape(self.n_inputs, 1)
@@ -46,23 +48,27 @@ class LinearRegression:
         return np.mean(self.squared_error)
 
     def _optimize(self, X, y):
-        """Optimize by stochastic gradient descent."""
+        """Optimize by stochastic gradient descent.
+
+        Returns the prediction computed before the update, to be reused by the loss.
+        """
         m = X.shape[0]
 
         y_ = self._model(X) 
-        dw = 1 / m * np.matmul(X.T, y_ - y)
-        db = np.mean(y_ - y)
+        residual = y_ - y
+        dw = np.matmul(X.T, residual)
+        db = np.mean(residual)
 
-        for (param, grad) in zip([self.w, self.b], [dw, db]):
-            param[:] = param - self.lr * grad
+        dw *= self.lr / m
+        self.w -= dw
+        self.b -= self.lr * db
+        return y_
 
     def _fetch_batch(self):
-        """Fetch batch dataset."""
-        idx = list(range(self.n_examples))
+        """Fetch batch dataset as slice views, without copying."""
         for i in range(0, self.n_examples, self.batch_size):
-            idx_batch = idx[i:min(i + self.batch_size, self.n_examples)]
-            yield (self.X_train.take(idx_batch, axis=0), 
-                   self.y_train.take(idx_batch, axis=0))
+            yield (self.X_train[i:i + self.batch_size],
+                   self.y_train[i:i + self.batch_size])
 
     def fit(self):
         """Fit model."""
@@ -71,9 +77,8 @@ class LinearRegression:
         for epoch in range(self.n_epochs):
             total_loss = 0
             for X_train_b, y_train_b in self._fetch_batch():
-                y_train_b = y_train_b.reshape((y_train_b.shape[0], -1))
-                self._optimize(X_train_b, y_train_b)
-                batch_loss = self._loss(y_train_b, self._model(X_train_b))
+                y_train_b_ = self._optimize(X_train_b, y_train_b)
+                batch_loss = self._loss(y_train_b, y_train_b_)
                 total_loss += batch_loss * X_train_b.shape[0]
 
             if epoch % 100 == 0:
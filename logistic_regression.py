@@ -2,10 +2,13 @@
 # -*- coding:utf-8 -*-
 from __future__ import absolute_import, division, print_function
 
+from typing import Callable
+
 import numpy as np
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 from torch import Tensor
 
 
@@ -19,7 +22,34 @@ class LogisticRegression(nn.Module):
         self.fc1 = nn.Linear(self.input_dim, 1)
         self.sigmoid = nn.Sigmoid()
 
+    def logit(self, x: Tensor) -> Tensor:
+        return self.fc1(x)
+
     def forward(self, x: Tensor) -> Tensor:
-        x = self.fc1(x)
+        x = self.logit(x)
         x = self.sigmoid(x)
         return x
+
+
+def make_train_step(
+    model: LogisticRegression,
+    optimizer: torch.optim.Optimizer,
+) -> Callable[[Tensor, Tensor], Tensor]:
+    """Make training step with the loss compiled by torch.compile.
+
+    The loss is binary cross entropy with logits, which fuses sigmoid and
+    cross entropy stably; compiling traces it and its backward once into a
+    graph of fused kernels, reused by later steps.
+    """
+    @torch.compile
+    def compute_loss(x: Tensor, y: Tensor) -> Tensor:
+        return F.binary_cross_entropy_with_logits(model.logit(x).squeeze(-1), y)
+
+    def train_step(x: Tensor, y: Tensor) -> Tensor:
+        optimizer.zero_grad(set_to_none=True)
+        loss = compute_loss(x, y)
+        loss.backward()
+        optimizer.step()
+        return loss.detach()
+
+    return train_step
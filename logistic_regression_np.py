@@ -2,16 +2,65 @@
 # -*- coding:utf-8 -*-
 from __future__ import absolute_import, division, print_function
 
+import math
+
 import numpy as np
+from scipy.special import expit
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _sgd_epoch(X, y, w, b, lr, batch_size):
+    """One epoch of minibatch SGD with weights w and bias b updated in place.
+
+    Sigmoid, residual and loss share one exp(-|z|) per example in a scalar
+    loop, which numba vectorizes (by SVML if installed) and which never
+    overflows, as fastmath assumes no infs. The matmuls stay on BLAS: fusing
+    them into per-row loops measured slower, even at 455 x 30.
+
+    Returns the summed cross entropy loss over all examples.
+    """
+    n = X.shape[0]
+    total_loss = 0.0
+    # Keep residual in the dtype of X and w, as numba's @ needs matching dtypes.
+    residual = np.empty(batch_size, dtype=w.dtype)
+    for i in range(0, n, batch_size):
+        X_b = X[i:i + batch_size]
+        y_b = y[i:i + batch_size]
+        m = X_b.shape[0]
+
+        logit = X_b @ w + b[0]
+        for j in range(m):
+            z = logit[j]
+            e = math.exp(-abs(z))
+            p = 1.0 / (1.0 + e) if z >= 0 else e / (1.0 + e)
+            residual[j] = p - y_b[j]
+            total_loss += max(z, 0.0) + math.log1p(e) - y_b[j] * z
+
+        dw = X_b.T @ residual[:m]
+        for k in range(w.shape[0]):
+            w[k] -= lr * dw[k] / m
+        b[0] -= lr * np.mean(residual[:m])
+    return total_loss
+
+
+if njit is not None:
+    _sgd_epoch = njit(fastmath=True, boundscheck=False, cache=True)(_sgd_epoch)
 
 
 class LogisticRegression:
     """Numpy implementation of Logistic Regression."""
 
-    def __init__(self, batch_size=64, lr=0.01, n_epochs=1000):
+    def __init__(self, batch_size=64, lr=0.01, n_epochs=1000, jit=False):
+        if jit and njit is None:
+            raise ImportError("Need numba installed to set jit=True.")
         self.batch_size = batch_size
         self.lr = lr
         self.n_epochs = n_epochs
+        self.jit = jit
 
     def get_data(self, X_train, y_train, shuffle=True):
         """Get dataset and information."""
@@ -22,90 +71,116 @@ class LogisticRegression:
         self.n_examples, self.n_inputs = self.X_train.shape
 
         if shuffle:
-            idx = list(range(self.n_examples))
-            random.shuffle(idx)
+            idx = np.random.permutation(self.n_examples)
             self.X_train = self.X_train[idx]
             self.y_train = self.y_train[idx]
 
+        # Flatten labels to match the 1-D logits.
+        self.y_train = self.y_train.reshape(-1).astype(np.float32)
+
+        # Cache contiguous X and X^T, so gradients need no per-batch transpose.
+        # Single precision halves the memory traffic of the matmuls.
+        # X_train_T is the feature-major (SoA) layout of X: each feature's
+        # samples are contiguous, for the X^T @ residual reduction.
+        self.X_train = np.ascontiguousarray(self.X_train, dtype=np.float32)
+        self.X_train_T = np.ascontiguousarray(self.X_train.T)
+
     def _create_weights(self):
-        """Create model weights and bias."""
-        self.w = np.zeros(self.n_inputs).reshape(self.n_inputs, 1)
-        self.b = np.zeros(1).reshape(1, 1)
+        """Create model weights and bias.
+
+        Weights are 1-D, so X @ w runs matrix-vector GEMV instead of GEMM.
+        """
+        self.w = np.zeros(self.n_inputs, dtype=np.float32)
+        self.b = np.zeros(1, dtype=np.float32)
 
-    def _logit(self, X):
+        # Buffers reused by every batch in _optimize.
+        self._buf_z = np.empty(self.batch_size, dtype=np.float32)
+        self._buf_residual = np.empty(self.batch_size, dtype=np.float32)
+        self._buf_dw = np.empty(self.n_inputs, dtype=np.float32)
+
+    def _logit(self, X, out=None):
         """Logit: unnormalized log probability."""
-        return np.matmul(X, self.w) + self.b
+        logit = np.dot(X, self.w, out=out)
+        logit += self.b
+        return logit
 
-    def _sigmoid(self, logit):
-        """Sigmoid function by stabilization trick.
+    def _sigmoid(self, logit, out=None):
+        """Sigmoid function by scipy expit.
 
-        sigmoid(z) = 1 / (1 + exp(-z)) 
-                   = exp(z) / (1 + exp(z)) * exp(z_max) / exp(z_max)
-                   = exp(z - z_max) / (exp(-z_max) + exp(z - z_max)),
-        where z is the logit, and z_max = z - max(0, z).
+        sigmoid(z) = 1 / (1 + exp(-z)),
+        computed in a single ufunc which does not overflow for large |z|.
         """
-        logit_max = np.maximum(0, logit)
-        logit_stable = logit - logit_max
-        return np.exp(logit_stable) / (np.exp(-logit_max) + np.exp(logit_stable))
-    
+        return expit(logit, out=out)
+
     def _model(self, X):
         """Logistic regression model."""
         logit = self._logit(X)
         return self._sigmoid(logit)
 
     def _loss(self, y, logit):
-        """Cross entropy loss by stabilizaiton trick.
+        """Cross entropy loss by logaddexp.
 
         cross_entropy_loss(y, z) 
           = - 1/n * \sum_{i=1}^n y_i * log p(y_i = 1|x_i) + (1 - y_i) * log p(y_i = 0|x_i)
-          = - 1/n * \sum_{i=1}^n y_i * (z_i - log(1 + exp(z_i))) + (1 - y_i) * (-log(1 + exp(z_i))),
-        where z is the logit, z_max = z - max(0, z),
-          log p(y = 1|x)
-            = log (1 / (1 + exp(-z))) 
-            = log (exp(z) / (1 + exp(z)))
-            = z - log(1 + exp(z))
-        and 
-          log(1 + exp(z)) := logsumexp(z)
-            = log(exp(0) + exp(z))
-            = log(exp(0) + exp(z) * exp(z_max) / exp(z_max))
-            = z_max + log(exp(-z_max) + exp(z - z_max)).
+          = - 1/n * \sum_{i=1}^n y_i * (z_i - log(1 + exp(z_i))) + (1 - y_i) * (-log(1 + exp(z_i)))
+          = 1/n * \sum_{i=1}^n log(1 + exp(z_i)) - y_i * z_i,
+        where z is the logit, and log(1 + exp(z)) = logaddexp(0, z) is computed
+        stably by numpy.
+        """
+        return np.mean(np.logaddexp(0, logit) - y * logit)
+
+    def _optimize(self, X, X_T, y):
+        """Optimize by stochastic gradient descent.
+
+        Returns the logit computed before the update, to be reused by the loss;
+        it is a view of a buffer overwritten by the next batch.
         """
-        logit_max = np.maximum(0, logit)
-        logit_stable = logit - logit_max
-        logsumexp_stable = logit_max + np.log(np.exp(-logit_max) + np.exp(logit_stable))
-        self.cross_entropy = -(y * (logit - logsumexp_stable) + (1 - y) * (-logsumexp_stable))
-        return np.mean(self.cross_entropy)
-
-    def _optimize(self, X, y):
-        """Optimize by stochastic gradient descent."""
         m = X.shape[0]
 
-        y_ = self._model(X) 
-        dw = 1 / m * np.matmul(X.T, y_ - y)
-        db = np.mean(y_ - y)
+        logit = self._logit(X, out=self._buf_z[:m])
+        residual = self._sigmoid(logit, out=self._buf_residual[:m])
+        residual -= y
+        dw = np.matmul(X_T, residual, out=self._buf_dw)
+        db = np.mean(residual)
 
-        for (param, grad) in zip([self.w, self.b], [dw, db]):
-            param[:] = param - self.lr * grad
+        # Scale the gradient in its buffer by lr / m, to update w with no temporaries.
+        dw *= self.lr / m
+        self.w -= dw
+        self.b -= self.lr * db
+        return logit
 
     def _fetch_batch(self):
-        """Fetch batch dataset."""
-        idx = list(range(self.n_examples))
+        """Fetch batch dataset as slice views, without copying."""
         for i in range(0, self.n_examples, self.batch_size):
-            idx_batch = idx[i:min(i + self.batch_size, self.n_examples)]
-            yield (self.X_train.take(idx_batch, axis=0), 
-                   self.y_train.take(idx_batch, axis=0))
+            yield (self.X_train[i:i + self.batch_size],
+                   self.X_train_T[:, i:i + self.batch_size],
+                   self.y_train[i:i + self.batch_size])
+
+    def _fit_epoch(self):
+        """Fit one epoch in Python, and return the summed training loss."""
+        n_batches = (self.n_examples + self.batch_size - 1) // self.batch_size
+        batch_losses = np.empty(n_batches)
+        batches = enumerate(self._fetch_batch())
+        for batch_idx, (X_train_b, X_train_T_b, y_train_b) in batches:
+            logit_b = self._optimize(X_train_b, X_train_T_b, y_train_b)
+            batch_losses[batch_idx] = self._loss(y_train_b, logit_b) * X_train_b.shape[0]
+        return batch_losses.sum()
 
     def fit(self):
-        """Fit model."""
+        """Fit model.
+
+        With jit=True, each epoch runs in a single numba-compiled call, which
+        removes the per-batch Python overhead dominating small datasets.
+        """
         self._create_weights()
 
         for epoch in range(self.n_epochs):
-            total_loss = 0
-            for X_train_b, y_train_b in self._fetch_batch():
-                y_train_b = y_train_b.reshape((y_train_b.shape[0], -1))
-                self._optimize(X_train_b, y_train_b)
-                train_loss = self._loss(y_train_b, self._logit(X_train_b))
-                total_loss += train_loss * X_train_b.shape[0]
+            if self.jit:
+                total_loss = _sgd_epoch(
+                    self.X_train, self.y_train, self.w, self.b,
+                    self.lr, self.batch_size)
+            else:
+                total_loss = self._fit_epoch()
 
             if epoch % 100 == 0:
                 print('epoch {0}: training loss {1}'
@@ -115,7 +190,7 @@ class LogisticRegression:
 
     def get_coeff(self):
         """Get model coefficients."""
-        return self.b, self.w.reshape((-1,))
+        return self.b.reshape((1, 1)), self.w.reshape((-1,))
 
     def predict(self, X):
         """Predict for new data."""
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+import torch
+from torch.utils.data import DataLoader
+
+from data_loader import (
+    Batch, CustomDataset, DataPrefetcher, DataReader, make_data_loader
+)
+
+
+INSURANCE_TRAIN_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "datasets", "insurance", "insurance_train.csv",
+)
+FLOAT_FEATURE_NAMES = ["age", "bmi", "children"]
+
+
+def _make_data_reader(**feature_names):
+    if not feature_names:
+        feature_names = dict(float_feature_names=FLOAT_FEATURE_NAMES)
+    return DataReader(
+        label_name="charges", file_name=INSURANCE_TRAIN_FILE, **feature_names
+    )
+
+
+def _make_dataset():
+    pytest.importorskip("pyarrow")
+    return CustomDataset(_make_data_reader())
+
+
+def test_read_arrays():
+    pytest.importorskip("pyarrow")
+    feature_names = ["bmi", "children", "age"]
+    features, labels = _make_data_reader(
+        float_feature_names=feature_names
+    ).read_arrays()
+
+    data_df = pd.read_csv(INSURANCE_TRAIN_FILE)
+    assert features.dtype == np.float32
+    assert labels.dtype == np.float32
+    assert features.flags.c_contiguous
+    np.testing.assert_allclose(
+        features, data_df.loc[:, feature_names].values, rtol=1e-6
+    )
+    np.testing.assert_allclose(labels, data_df["charges"].values, rtol=1e-6)
+
+
+def test_read_arrays_non_numeric():
+    pytest.importorskip("pyarrow")
+    data_reader = _make_data_reader(
+        float_feature_names=FLOAT_FEATURE_NAMES, id_list_feature_names=["sex"]
+    )
+    with pytest.raises(ValueError, match="sex"):
+        data_reader.read_arrays()
+
+
+def test_default_data_loader():
+    dataset = _make_dataset()
+    loader = DataLoader(dataset, batch_size=4)
+
+    n_examples = 0
+    for examples, labels in loader:
+        assert examples.shape == (labels.shape[0], len(FLOAT_FEATURE_NAMES))
+        n_examples += labels.shape[0]
+    assert n_examples == len(dataset)
+
+
+def test_make_data_loader():
+    dataset = _make_dataset()
+    loader = make_data_loader(dataset, batch_size=64, shuffle=False)
+
+    batch = next(iter(loader))
+    assert isinstance(batch, Batch)
+    assert torch.equal(batch.data, dataset.examples[:64])
+    assert torch.equal(batch.label, dataset.labels[:64])
+    assert sum(len(batch.label) for batch in loader) == len(dataset)
+
+
+def test_make_data_loader_shuffle():
+    dataset = _make_dataset()
+    loader = make_data_loader(dataset, batch_size=64)
+
+    labels = torch.cat([batch.label for batch in loader])
+    assert torch.equal(labels.sort().values, dataset.labels.sort().values)
+
+
+def test_getitem_index_types():
+    dataset = _make_dataset()
+
+    example, label = dataset[0]
+    assert example.shape == (len(FLOAT_FEATURE_NAMES),)
+    assert label.shape == ()
+
+    for idx in ([0, 2], np.array([0, 2]), torch.tensor([0, 2])):
+        batch = dataset[idx]
+        assert isinstance(batch, Batch)
+        assert torch.equal(batch.data, dataset.examples[[0, 2]])
+        assert torch.equal(batch.label, dataset.labels[[0, 2]])
+
+
+def test_batch_to_cpu():
+    dataset = _make_dataset()
+    batch = dataset[[0, 1]].to(torch.device("cpu"), non_blocking=True)
+    assert isinstance(batch, Batch)
+    assert batch.data.device.type == "cpu"
+    assert torch.equal(batch.label, dataset.labels[:2])
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="Need CUDA.")
+def test_batch_pin_memory():
+    dataset = _make_dataset()
+    batch = dataset[[0, 1]].pin_memory()
+    assert batch.data.is_pinned()
+    assert batch.label.is_pinned()
+
+
+def test_data_prefetcher_cpu():
+    dataset = _make_dataset()
+    loader = make_data_loader(dataset, batch_size=64, shuffle=False)
+
+    batches = list(DataPrefetcher(loader, torch.device("cpu")))
+    assert len(batches) == len(loader)
+    assert torch.equal(torch.cat([batch.label for batch in batches]), dataset.labels)
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="Need CUDA.")
+def test_data_prefetcher_cuda():
+    dataset = _make_dataset()
+    loader = make_data_loader(
+        dataset, batch_size=64, shuffle=False, pin_memory=True
+    )
+
+    batches = list(DataPrefetcher(loader, torch.device("cuda")))
+    assert all(batch.data.is_cuda for batch in batches)
+    labels = torch.cat([batch.label for batch in batches]).cpu()
+    assert torch.equal(labels, dataset.labels)
+
+
+def test_custom_dataset_to_cpu():
+    dataset = _make_dataset()
+    assert dataset.to(torch.device("cpu")) is dataset
+
+    batch = dataset[[0, 1]]
+    assert batch.data.device.type == "cpu"
+    assert dataset[0][0].device.type == "cpu"
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="Need CUDA.")
+def test_custom_dataset_to_cuda():
+    dataset = _make_dataset().to(torch.device("cuda"))
+    loader = make_data_loader(dataset, batch_size=64, shuffle=False)
+
+    batches = list(loader)
+    assert all(batch.data.is_cuda for batch in batches)
+    assert sum(len(batch.label) for batch in batches) == len(dataset)
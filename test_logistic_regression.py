@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import torch
+
+from logistic_regression import LogisticRegression, make_train_step
+
+
+def test_forward_is_sigmoid_of_logit():
+    torch.manual_seed(0)
+    model = LogisticRegression(input_dim=3)
+    x = torch.randn(8, 3)
+
+    torch.testing.assert_close(model(x), torch.sigmoid(model.logit(x)))
+
+
+def test_make_train_step_cpu():
+    torch.manual_seed(0)
+    x = torch.randn(256, 3)
+    y = (x[:, 0] > 0).float()
+    model = LogisticRegression(input_dim=3)
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.5)
+    train_step = make_train_step(model, optimizer)
+
+    losses = [train_step(x, y).item() for _ in range(20)]
+    assert losses[-1] < losses[0]
+
+    accuracy = ((model(x).squeeze(-1) > 0.5).float() == y).float().mean()
+    assert accuracy > 0.9
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import re
+
+import numpy as np
+import pytest
+
+from logistic_regression_np import LogisticRegression
+
+
+def _make_data():
+    rng = np.random.RandomState(0)
+    X = rng.randn(455, 30)
+    y = (X[:, 0] + 0.5 * rng.randn(455) > 0).astype(np.int64)
+    return X, y
+
+
+def _fit(X, y, jit, capsys):
+    model = LogisticRegression(batch_size=64, lr=0.01, n_epochs=201, jit=jit)
+    model.get_data(X, y, shuffle=False)
+    model.fit()
+    out = capsys.readouterr().out
+    losses = [float(loss) for loss in re.findall(r"training loss (\S+)", out)]
+    return model, losses
+
+
+def test_fit_jit_matches_numpy(capsys):
+    pytest.importorskip("numba")
+    X, y = _make_data()
+
+    model_np, losses_np = _fit(X, y, False, capsys)
+    model_jit, losses_jit = _fit(X, y, True, capsys)
+
+    assert len(losses_np) == len(losses_jit) == 3
+    np.testing.assert_allclose(losses_jit, losses_np, rtol=1e-5)
+    b_np, w_np = model_np.get_coeff()
+    b_jit, w_jit = model_jit.get_coeff()
+    np.testing.assert_allclose(b_jit, b_np, rtol=1e-4, atol=1e-5)
+    np.testing.assert_allclose(w_jit, w_np, rtol=1e-4, atol=1e-5)
+
+
+def test_get_coeff_and_predict(capsys):
+    X, y = _make_data()
+    model, losses = _fit(X, y, False, capsys)
+    assert losses[-1] < losses[0]
+
+    b, w = model.get_coeff()
+    assert b.shape == (1, 1)
+    assert w.shape == (30,)
+
+    logit = X @ w.astype(np.float64) + b[0, 0]
+    np.testing.assert_allclose(model.predict(X), 1 / (1 + np.exp(-logit)), rtol=1e-5)